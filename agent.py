@@ -2,14 +2,20 @@
 Mercari AI Shopping Agent
 
 This agent works with OpenAI's GPT models including GPT-4o.
-It uses OpenAI's function calling API for tool execution.
+It uses OpenAI's function calling API for tool execution, with an async
+client so model round-trips and tool calls don't block each other.
 """
 
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError
 import os
-import json
+import copy
+import time
+import orjson
+import random
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Generator
+import contextlib
+from typing import Dict, Any, Optional, Generator, AsyncGenerator, AsyncIterator
 from dotenv import load_dotenv
 
 # Configure logging
@@ -18,7 +24,19 @@ logging.basicConfig(level=logging.INFO)
 # Load environment variables from .env file
 load_dotenv()
 
-from tools import TOOLS_OPENAI, execute_tool
+from tools import TOOLS_OPENAI, TOOLS_OPENAI_BYTES, aexecute_tool, to_json
+from prompt_buffer import PromptBuffer
+
+# Streamed tokens are grouped before being yielded: the first group holds
+# DEFAULT_MIN_BATCH_SIZE tokens and each following group grows by the growth
+# factor up to DEFAULT_BATCH_SIZE, or flushes early after STREAM_FLUSH_INTERVAL seconds
+DEFAULT_MIN_BATCH_SIZE = 1
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_SIZE_GROWTH_FACTOR = 3
+STREAM_FLUSH_INTERVAL = 0.05
+
+# Where committed conversation turns are kept between CLI sessions
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".mercari_agent", "state.json")
 
 
 class MercariAgentOpenAI:
@@ -30,7 +48,15 @@ class MercariAgentOpenAI:
         self, 
         api_key: Optional[str] = None, 
         model: str = "gpt-4o",
-        base_url: Optional[str] = None
+        base_url: Optional[str] = None,
+        enable_parallel_tool_execution: bool = True,
+        max_concurrent_requests: int = 8,
+        max_rate_limit_retries: int = 5,
+        state_path: Optional[str] = DEFAULT_STATE_PATH,
+        max_persisted_turns: int = 10,
+        max_history_tokens: int = 8000,
+        keep_recent_turns: int = 4,
+        summary_model: Optional[str] = None
     ):
         """
         Initialize the Mercari AI Agent with OpenAI.
@@ -39,6 +65,14 @@ class MercariAgentOpenAI:
             api_key: OpenAI API key or GitHub token (defaults to OPENAI_API_KEY or GITHUB_TOKEN env var)
             model: Model to use (default: gpt-4o)
             base_url: Base URL for API (use "https://models.inference.ai.azure.com" for GitHub Models)
+            enable_parallel_tool_execution: Run all tool calls from one model response concurrently (default: True)
+            max_concurrent_requests: Maximum model calls in flight at once across all sessions (default: 8)
+            max_rate_limit_retries: Retries with exponential backoff when the provider returns 429 (default: 5)
+            state_path: File used to persist the conversation between sessions (None disables persistence)
+            max_persisted_turns: Number of recent turns restored from state_path on startup (default: 10)
+            max_history_tokens: Approximate history size that triggers summarizing older turns (default: 8000)
+            keep_recent_turns: Turns kept verbatim when the history is summarized (default: 4)
+            summary_model: Model used to summarize old turns (defaults to model)
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY") or os.environ.get("GITHUB_TOKEN")
         if not self.api_key:
@@ -52,9 +86,17 @@ class MercariAgentOpenAI:
         if base_url:
             client_kwargs["base_url"] = base_url
         
-        self.client = OpenAI(**client_kwargs)
+        self.client = AsyncOpenAI(**client_kwargs)
         self.model = model
-        self.conversation_history = []
+        self.enable_parallel_tool_execution = enable_parallel_tool_execution
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self._llm_sem = asyncio.Semaphore(max_concurrent_requests)
+        self._sync_loop = None
+        self.state_path = state_path
+        self.max_persisted_turns = max_persisted_turns
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_model = summary_model or model
         
         self.system_message = {
             "role": "system",
@@ -67,8 +109,8 @@ class MercariAgentOpenAI:
             2. Translate English keywords to Japanese if needed (e.g., "toys" → "おもちゃ")
             3. Use the search_mercari function right away
             4. Analyze results with analyze_products to get top 3 recommendations
-            5. IMPORTANT: For each of the top 3 recommended products, use get_product_details to fetch 
-               complete information (condition, description, shipping). This takes a few seconds per product 
+            5. IMPORTANT: For the top 3 recommended products, use get_product_details_bulk with all 3 URLs to fetch 
+               complete information (condition, description, shipping) in parallel. This takes a few seconds 
                but provides accurate details instead of "See details".
             6. Present recommendations with FULL details in this format:
 
@@ -85,93 +127,289 @@ class MercariAgentOpenAI:
             Be proactive. Search first, fetch details for top picks, show complete results, then offer to refine.
             Always provide product URLs so users can view items on Mercari."""
         }
+        self.prompt_buffer = PromptBuffer(self.system_message)
+        self._load_state()
+        
+        # Chat Completions has no server-side tool registry, so the schema rides along on every call
+        logging.debug("Tool schema adds %d bytes to each request", TOOLS_OPENAI_BYTES)
+    
+    @property
+    def conversation_history(self) -> list:
+        """Completed user/assistant turns."""
+        return self.prompt_buffer.history
     
     def chat(self, user_message: str) -> str:
         """Process a user message and return the agent's response."""
-        self.conversation_history.append({"role": "user", "content": user_message})
-        response = self._run_agent_loop(stream=False)
-        self.conversation_history.append({"role": "assistant", "content": response})
-        return response
+        return self._get_sync_loop().run_until_complete(self.achat(user_message))
     
     def chat_stream(self, user_message: str) -> Generator[str, None, None]:
         """Process a user message and stream the agent's response."""
-        self.conversation_history.append({"role": "user", "content": user_message})
+        loop = self._get_sync_loop()
+        stream = self.achat_stream(user_message)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(stream.aclose())
+    
+    async def achat(self, user_message: str) -> str:
+        """Async version of chat()."""
+        self.prompt_buffer.start_turn(user_message)
+        response = "".join([chunk async for chunk in self._run_agent_loop(stream=False)])
+        self.prompt_buffer.commit_turn(response)
+        await self._compact_history()
+        return response
+    
+    async def achat_stream(self, user_message: str) -> AsyncGenerator[str, None]:
+        """Async version of chat_stream()."""
+        self.prompt_buffer.start_turn(user_message)
         
         full_response = ""
-        for chunk in self._run_agent_loop(stream=True):
+        async for chunk in self._run_agent_loop(stream=True):
             full_response += chunk
             yield chunk
         
-        self.conversation_history.append({"role": "assistant", "content": full_response})
+        self.prompt_buffer.commit_turn(full_response)
+        await self._compact_history()
     
-    def _run_agent_loop(self, stream: bool = False, max_iterations: int = 10):
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Return the event loop used by the synchronous chat methods.
+        
+        A single loop is kept for the agent's lifetime because the async client's
+        connection pool is bound to the loop it was first used on.
+        """
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = asyncio.new_event_loop()
+        return self._sync_loop
+    
+    async def _run_agent_loop(self, stream: bool = False, max_iterations: int = 10) -> AsyncGenerator[str, None]:
         """
         Execute the agentic loop with function calling.
         
+        Every model call is streamed, and tool calls are assembled from the deltas as
+        they arrive, so the final answer comes from the same call that decided no more
+        tools were needed instead of a second request.
+        
         Args:
-            stream: If True, yields chunks; if False, returns full response string
+            stream: If True, yields the answer chunk by chunk; if False, yields it once in full
             max_iterations: Maximum iterations to prevent infinite loops
         """
-        messages = [self.system_message] + self.conversation_history
-        
         for _ in range(max_iterations):
-            response = self.client.chat.completions.create(
+            # The concurrency slot is held until the stream is fully consumed, since
+            # that is how long the generation occupies the provider
+            async with self._completion(
                 model=self.model,
-                messages=messages,
+                messages=self.prompt_buffer.build(),
                 tools=TOOLS_OPENAI,
-                tool_choice="auto"
-            )
-            
-            response_message = response.choices[0].message
+                tool_choice="auto",
+                stream=True
+            ) as stream_response:
+                content_parts = []
+                tool_calls = {}
+                
+                # Flush the first tokens immediately for a fast first paint, then
+                # batch progressively larger groups to cut per-write overhead
+                buffer = []
+                next_flush_size = DEFAULT_MIN_BATCH_SIZE
+                last_flush = time.monotonic()
+                async for chunk in stream_response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                
+                    # Tool call names and arguments arrive in fragments keyed by index
+                    for tool_call_delta in delta.tool_calls or []:
+                        tool_call = tool_calls.setdefault(tool_call_delta.index, {
+                            "id": "",
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""}
+                        })
+                        if tool_call_delta.id:
+                            tool_call["id"] = tool_call_delta.id
+                        if tool_call_delta.function:
+                            tool_call["function"]["name"] += tool_call_delta.function.name or ""
+                            tool_call["function"]["arguments"] += tool_call_delta.function.arguments or ""
+                
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        if stream:
+                            buffer.append(delta.content)
+                            if len(buffer) >= next_flush_size or time.monotonic() - last_flush > STREAM_FLUSH_INTERVAL:
+                                yield "".join(buffer)
+                                buffer = []
+                                next_flush_size = min(DEFAULT_BATCH_SIZE, next_flush_size * DEFAULT_BATCH_SIZE_GROWTH_FACTOR)
+                                last_flush = time.monotonic()
+                if buffer:
+                    yield "".join(buffer)
             
             # Process function calls if any
-            if response_message.tool_calls:
-                messages.append(response_message)
+            if tool_calls:
+                tool_calls = [tool_calls[index] for index in sorted(tool_calls)]
+                self.prompt_buffer.append({
+                    "role": "assistant",
+                    "content": "".join(content_parts) or None,
+                    "tool_calls": tool_calls
+                })
                 
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    logging.info(f"Using function: {function_name}")
-                    logging.info(f"Function input: {json.dumps(function_args, indent=2, ensure_ascii=False)}")
+                for tool_call, function_result in zip(tool_calls, await self._execute_tool_calls(tool_calls)):
+                    # Serialize once; the log line reuses the message content
+                    content = to_json(function_result)
+                    if logging.getLogger().isEnabledFor(logging.INFO):
+                        logging.info("Function result: %s...", content[:500])
                     
-                    function_result = execute_tool(function_name, function_args)
-                    
-                    logging.info(f"Function result: {json.dumps(function_result, indent=2, ensure_ascii=False)[:500]}...")
-                    
-                    messages.append({
+                    self.prompt_buffer.append({
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": json.dumps(function_result, ensure_ascii=False)
+                        "tool_call_id": tool_call["id"],
+                        "name": tool_call["function"]["name"],
+                        "content": content
                     })
                 continue
             
-            # No more function calls return final response
-            if stream:
-                # Streaming for final response
-                stream_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    stream=True
-                )
-                for chunk in stream_response:
-                    if chunk.choices and len(chunk.choices) > 0 and chunk.choices[0].delta.content:
-                        yield chunk.choices[0].delta.content
-                return
-            else:
-                return response_message.content or "I apologize, but I couldn't generate a response."
-        
-        error_msg = "I apologize, but I've reached the maximum number of processing steps."
-        if stream:
-            yield error_msg
-        else:
-            return error_msg
+            # No more function calls, the streamed content is the final response
+            if not stream:
+                yield "".join(content_parts) or "I apologize, but I couldn't generate a response."
+            return
+        
+        yield "I apologize, but I've reached the maximum number of processing steps."
+    
+    async def _compact_history(self):
+        """
+        Summarize older turns once the history grows past max_history_tokens.
+        
+        Keeps prompt size per request roughly constant in long sessions instead of
+        growing with every turn. Recent turns are kept verbatim for coherence.
+        """
+        if self.prompt_buffer.estimate_tokens() <= self.max_history_tokens:
+            return
+        
+        keep_messages = 2 * self.keep_recent_turns
+        history = self.prompt_buffer.history
+        old_messages = history[:-keep_messages] if keep_messages > 0 else history
+        if not old_messages:
+            return
+        
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in old_messages)
+        try:
+            async with self._completion(
+                model=self.summary_model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Summarize this conversation between a shopper and a Mercari shopping assistant "
+                                   "in at most 200 tokens. Keep the searches made, products recommended, prices, "
+                                   "and the shopper's stated preferences."
+                    },
+                    {"role": "user", "content": transcript}
+                ],
+                max_tokens=300
+            ) as response:
+                summary = response.choices[0].message.content
+        except Exception as e:
+            logging.warning(f"Could not summarize conversation history: {e}")
+            return
+        
+        if summary:
+            self.prompt_buffer.compact(summary, keep_messages)
+            logging.info(f"Summarized {len(old_messages)} older messages to keep the prompt small.")
+    
+    @contextlib.asynccontextmanager
+    async def _completion(self, **kwargs) -> AsyncIterator[Any]:
+        """
+        Call the chat completions API under the concurrency limit.
+        
+        The response is yielded while the concurrency slot is still held and the slot
+        is released when the block exits, so a streamed generation counts against the
+        limit until it has been consumed. Rate-limited calls are retried with
+        exponential backoff plus random jitter so that concurrent sessions don't
+        retry in lockstep; the slot is given up while backing off.
+        """
+        for attempt in range(self.max_rate_limit_retries + 1):
+            await self._llm_sem.acquire()
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except RateLimitError:
+                self._llm_sem.release()
+                if attempt == self.max_rate_limit_retries:
+                    raise
+                delay = min(2 ** attempt, 30) + random.uniform(0, 1)
+                logging.warning(f"Rate limited by model provider, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._llm_sem.release()
+                raise
+            
+            try:
+                yield response
+            finally:
+                self._llm_sem.release()
+            return
+    
+    async def _execute_tool_calls(self, tool_calls: list) -> list:
+        """
+        Execute a batch of tool calls and return their results in call order.
+        
+        Tools are awaited through their async entry point so browser and network
+        I/O never blocks the event loop. When parallel execution is enabled the
+        whole batch is gathered, so the round takes as long as the slowest call.
+        """
+        calls = []
+        for tool_call in tool_calls:
+            function_name = tool_call["function"]["name"]
+            function_args = orjson.loads(tool_call["function"]["arguments"] or "{}")
+            
+            logging.info(f"Using function: {function_name}")
+            if logging.getLogger().isEnabledFor(logging.INFO):
+                logging.info("Function input: %s", orjson.dumps(function_args, option=orjson.OPT_INDENT_2).decode())
+            calls.append((function_name, function_args))
+        
+        if not self.enable_parallel_tool_execution:
+            return [await aexecute_tool(name, args) for name, args in calls]
+        
+        return await asyncio.gather(*[aexecute_tool(name, args) for name, args in calls])
     
     def reset_conversation(self):
         """Reset the conversation history."""
-        self.conversation_history = []
+        self.prompt_buffer.reset()
+        self.save_state()
         logging.info("Conversation history reset.")
+    
+    def _load_state(self):
+        """Restore recent turns saved by a previous session, if any."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.prompt_buffer.loads(f.read(), max_turns=self.max_persisted_turns)
+            logging.info(f"Restored {len(self.conversation_history)} messages from {self.state_path}")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not restore conversation state: {e}")
+    
+    def save_state(self):
+        """Persist the completed turns to state_path so the next session can resume."""
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "w", encoding="utf-8") as f:
+                f.write(self.prompt_buffer.dumps())
+        except OSError as e:
+            logging.warning(f"Could not save conversation state: {e}")
+    
+    def fork(self) -> "MercariAgentOpenAI":
+        """
+        Return a new agent with an empty conversation that shares this agent's
+        API client and concurrency limit.
+        """
+        session = copy.copy(self)
+        session.prompt_buffer = PromptBuffer(self.system_message)
+        session._sync_loop = None
+        session.state_path = None  # Sessions must not overwrite the shared state file
+        return session
 
 
 def main():
@@ -215,6 +453,7 @@ def main():
             if not user_input:
                 continue
             if user_input.lower() in ['quit', 'exit']:
+                agent.save_state()
                 print("\nGoodbye!")
                 break
             if user_input.lower() == 'reset':
@@ -229,6 +468,7 @@ def main():
             print("\n")
         
         except KeyboardInterrupt:
+            agent.save_state()
             print("\n\nGoodbye!")
             break
         except Exception as e:
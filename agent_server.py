@@ -0,0 +1,199 @@
+"""
+Request Batching Front-End for the Mercari AI Agent
+
+This module serves many concurrent chat sessions from one model backend. Requests
+arriving within a short window are collected and dispatched together, all sharing
+one API client and concurrency limit, and streamed tokens are flushed in small
+time-based chunks rather than one write per token.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, AsyncGenerator
+
+from agent import MercariAgentOpenAI
+
+
+# Marks the end of a response stream
+_END_OF_STREAM = object()
+
+
+class AgentServer:
+    """
+    Batch concurrent chat requests from multiple sessions through a shared agent backend.
+    """
+
+    def __init__(
+        self,
+        agent: Optional[MercariAgentOpenAI] = None,
+        batch_window_ms: int = 20,
+        max_batch_size: int = 16,
+        flush_interval_ms: int = 50,
+        max_sessions: int = 1000,
+        session_ttl: float = 1800
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            agent: Agent whose client and concurrency limit are shared by all sessions
+                (defaults to a new MercariAgentOpenAI from environment settings)
+            batch_window_ms: How long to wait for more requests before dispatching a batch (default: 20)
+            max_batch_size: Dispatch immediately once this many requests are queued (default: 16)
+            flush_interval_ms: How long to accumulate streamed tokens before sending them (default: 50)
+            max_sessions: Keep at most this many idle sessions, dropping the least recently used (default: 1000)
+            session_ttl: Drop a session after this many seconds without a request (default: 1800)
+        """
+        # The server's base agent only lends its client to forks; it must not pick up
+        # the CLI's saved conversation
+        self.agent = agent or MercariAgentOpenAI(state_path=None)
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+
+        self._pending: asyncio.Queue = asyncio.Queue()
+        # Ordered from least to most recently used
+        self._sessions: OrderedDict[str, MercariAgentOpenAI] = OrderedDict()
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_last_used: Dict[str, float] = {}
+        # Requests queued on or running in each session; such sessions are never evicted
+        self._session_active: Dict[str, int] = {}
+        self._tasks: set = set()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background batching loop."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        """Stop the batching loop and wait for in-flight requests to finish."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def chat_stream(self, session_id: str, user_message: str) -> AsyncGenerator[str, None]:
+        """Queue a message for a session and stream the agent's response."""
+        await self.start()
+
+        response_stream: asyncio.Queue = asyncio.Queue()
+        await self._pending.put((session_id, user_message, response_stream))
+
+        while True:
+            chunk = await response_stream.get()
+            if chunk is _END_OF_STREAM:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    async def chat(self, session_id: str, user_message: str) -> str:
+        """Queue a message for a session and return the agent's full response."""
+        return "".join([chunk async for chunk in self.chat_stream(session_id, user_message)])
+
+    def reset_session(self, session_id: str):
+        """Forget a session's conversation."""
+        self._sessions.pop(session_id, None)
+        self._session_locks.pop(session_id, None)
+        self._session_last_used.pop(session_id, None)
+
+    def _checkout_session(self, session_id: str, now: float):
+        """
+        Get or create a session for a request and mark it in use.
+
+        Returns:
+            The session's agent and the lock that serializes its turns
+        """
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+        else:
+            self._sessions[session_id] = self.agent.fork()
+            self._session_locks[session_id] = asyncio.Lock()
+        self._session_last_used[session_id] = now
+        self._session_active[session_id] = self._session_active.get(session_id, 0) + 1
+
+        self._evict_sessions(now)
+        return self._sessions[session_id], self._session_locks[session_id]
+
+    def _checkin_session(self, session_id: str, now: float):
+        """Mark a request on a session as finished, restarting its idle time."""
+        remaining = self._session_active.get(session_id, 0) - 1
+        if remaining > 0:
+            self._session_active[session_id] = remaining
+        else:
+            self._session_active.pop(session_id, None)
+
+        # The session may have been reset while the request ran
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+            self._session_last_used[session_id] = now
+
+    def _evict_sessions(self, now: float):
+        """Drop idle sessions past the TTL, then the least recently used beyond max_sessions."""
+        for session_id in list(self._sessions):
+            expired = now - self._session_last_used[session_id] >= self.session_ttl
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            if session_id in self._session_active:
+                continue
+            logging.debug(f"Evicting session {session_id}")
+            self.reset_session(session_id)
+
+    async def _batch_loop(self):
+        """Collect queued requests into batches and dispatch each batch concurrently."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.batch_window
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            logging.debug(f"Dispatching batch of {len(batch)} request(s)")
+            for session_id, user_message, response_stream in batch:
+                task = asyncio.create_task(self._serve(session_id, user_message, response_stream))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _serve(self, session_id: str, user_message: str, response_stream: asyncio.Queue):
+        """Run one request and forward its tokens in time-based chunks."""
+        loop = asyncio.get_running_loop()
+        session, session_lock = self._checkout_session(session_id, loop.time())
+        buffer = []
+        last_flush = loop.time()
+
+        try:
+            # Turns within one session must not interleave
+            async with session_lock:
+                try:
+                    async for token in session.achat_stream(user_message):
+                        buffer.append(token)
+                        if loop.time() - last_flush >= self.flush_interval:
+                            await response_stream.put("".join(buffer))
+                            buffer = []
+                            last_flush = loop.time()
+                    if buffer:
+                        await response_stream.put("".join(buffer))
+                except Exception as e:
+                    logging.error(f"Error serving session {session_id}: {e}")
+                    await response_stream.put(e)
+                finally:
+                    await response_stream.put(_END_OF_STREAM)
+        finally:
+            self._checkin_session(session_id, loop.time())
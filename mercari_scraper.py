@@ -5,18 +5,315 @@ This module handles all web scraping functionality for Mercari Japan using Selen
 to handle dynamic content and anti-bot measures.
 """
 
+import os
+import re
 import time
+import logging
+import asyncio
+import functools
+import concurrent.futures
+import threading
 import urllib.parse
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional, Any, Callable
+import httpx
+import orjson
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+from cachetools import TTLCache
+import diskcache
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, SessionNotCreatedException
 from webdriver_manager.chrome import ChromeDriverManager
 
+logger = logging.getLogger(__name__)
+
+# lxml's C parser builds trees several times faster than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
+
+# Item ID in a product URL or href such as "/item/m12345678?ref=search"
+_ITEM_ID_RE = re.compile(r'/item/([^/?#]+)')
+
+# Everything but the digits in a price or count string such as "¥12,300"
+_NON_DIGIT_RE = re.compile(r'\D+')
+
+# Text matchers for product-page fields that have no stable attribute to select on,
+# compiled once rather than rebuilt as lambdas per lookup
+_CONDITION_TEXT_RE = re.compile('新品|中古|未使用')
+_CONDITION_LABEL_RE = re.compile('商品の状態')
+_SHIPPING_TEXT_RE = re.compile('送料|配送')
+_SOLD_TEXT_RE = re.compile('SOLD', re.IGNORECASE)
+_SOLD_OUT_TEXT_RE = re.compile('売り切れ')
+
+# Returns the outer HTML of the first max_results cells matched by the first selector that matches anything
+_ITEM_GRID_SCRIPT = """
+const [selectors, maxResults] = arguments;
+for (const selector of selectors) {
+    const cells = document.querySelectorAll(selector);
+    if (cells.length) {
+        return Array.from(cells).slice(0, maxResults).map(cell => cell.outerHTML).join('');
+    }
+}
+return '';
+"""
+
+# Returns the number of cells matched by the first selector that matches anything
+_ITEM_CELL_COUNT_SCRIPT = """
+const [selectors] = arguments;
+for (const selector of selectors) {
+    const count = document.querySelectorAll(selector).length;
+    if (count) {
+        return count;
+    }
+}
+return 0;
+"""
+
+# Every node _extract_product_info reads from a search result cell, matched in a single query
+_ITEM_FIELDS_SELECTOR = ", ".join([
+    "a[href*='/item/']",
+    "img",
+    "span[data-testid='thumbnail-title']", "h3", "span[class*='itemName']",
+    "span[data-testid='thumbnail-price']", "span[class*='price' i]", "mer-price",
+    "div[aria-label='売り切れ']", "div.sold"
+])
+
+# Resources the scraper never parses, blocked in the browser to speed up page loads
+_BLOCKED_URL_PATTERNS = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.css", "*.woff", "*.woff2", "*.ttf"]
+
+# Restricts parsing to the Next.js data blob embedded in Mercari pages
+_NEXT_DATA_STRAINER = SoupStrainer('script', id='__NEXT_DATA__')
+
+# Reads the same blob from a loaded page in the browser
+_NEXT_DATA_SCRIPT = "return document.getElementById('__NEXT_DATA__')?.textContent || null;"
+
+# Key paths under props.pageProps where a search page keeps its result list; other lists of
+# item-shaped objects on the page (recommendations, ads) are ignored
+_NEXT_DATA_ITEM_PATHS = [("searchResult", "items"), ("items",)]
+
+# Search results and product details shared across runs and processes
+DEFAULT_DISK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".mercari_agent", "cache")
+
+# Remembers the chromedriver binary resolved by a previous run
+_DRIVER_PATH_FILE = os.path.join(os.path.expanduser("~"), ".wdm", "mercari_agent_chromedriver_path")
+
+
+@functools.lru_cache(maxsize=None)
+def _chromedriver_path() -> str:
+    """
+    Resolve the chromedriver binary once per process.
+    
+    Reuses the path saved by a previous run when the binary still exists, so cold
+    starts skip webdriver-manager's network version check.
+    """
+    try:
+        with open(_DRIVER_PATH_FILE, encoding="utf-8") as f:
+            cached_path = f.read().strip()
+        if os.path.isfile(cached_path) and os.access(cached_path, os.X_OK):
+            return cached_path
+    except OSError:
+        pass
+    
+    path = ChromeDriverManager().install()
+    try:
+        os.makedirs(os.path.dirname(_DRIVER_PATH_FILE), exist_ok=True)
+        with open(_DRIVER_PATH_FILE, "w", encoding="utf-8") as f:
+            f.write(path)
+    except OSError:
+        pass
+    return path
+
+
+def _forget_chromedriver_path():
+    """Drop the remembered chromedriver path, e.g. after Chrome updated and it no longer matches."""
+    _chromedriver_path.cache_clear()
+    try:
+        os.remove(_DRIVER_PATH_FILE)
+    except OSError:
+        pass
+
+
+# Pending HTTP client closes; asyncio keeps only weak references to tasks, so they're held here until done
+_http_client_close_tasks: set = set()
+
+
+def _on_http_client_closed(task: asyncio.Task):
+    """Release a finished close task and report any error it raised."""
+    _http_client_close_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Error closing HTTP client: {task.exception()}")
+
+
+def _iter_tags(soup: BeautifulSoup, names: tuple):
+    """Yield tags with one of the given names in document order, so a search loop can stop at its first hit."""
+    for node in soup.descendants:
+        if node.name in names:
+            yield node
+
+
+class _ItemCellsSettled:
+    """
+    WebDriverWait condition for the search grid: true once `target` item cells have
+    rendered, or once the cell count has been non-zero and unchanged for `settle_time`
+    seconds (fewer hits than requested, so waiting longer wouldn't add any).
+    
+    Cells are counted with the first of `selectors` that matches anything, the same
+    choice _ITEM_GRID_SCRIPT makes, so nested matches of other selectors aren't
+    counted twice.
+    """
+    
+    def __init__(self, selectors: List[str], target: int, settle_time: float):
+        self.selectors = selectors
+        self.target = target
+        self.settle_time = settle_time
+        self.last_count = None
+        self.last_change = None
+    
+    def __call__(self, driver: webdriver.Chrome) -> bool:
+        count = driver.execute_script(_ITEM_CELL_COUNT_SCRIPT, self.selectors) or 0
+        if count >= self.target:
+            return True
+        
+        now = time.monotonic()
+        if count != self.last_count:
+            self.last_count = count
+            self.last_change = now
+            return False
+        return count > 0 and now - self.last_change >= self.settle_time
+
+
+class BrowserPool:
+    """
+    A pool of Chrome drivers checked out per request.
+    
+    Drivers are started on demand up to `size` (or ahead of time with warm_up())
+    and reused across requests. A driver is recycled after `max_uses` navigations
+    or whenever it is released after an error, so a long-running or wedged
+    browser never lingers in the pool.
+    """
+    
+    def __init__(self, factory: Callable[[], webdriver.Chrome], size: int = 3, max_uses: int = 50):
+        """
+        Initialize the pool.
+        
+        Args:
+            factory: Callable that starts a new driver
+            size: Maximum number of drivers alive at once (default: 3)
+            max_uses: Number of checkouts after which a driver is replaced (default: 50)
+        """
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        
+        # Idle drivers ready for reuse; waiters are woken whenever a driver is returned
+        # or a slot is freed, so they can take it over and start their own driver
+        self._idle: List[webdriver.Chrome] = []
+        self._uses: Dict[webdriver.Chrome, int] = {}
+        self._count = 0
+        self._cond = threading.Condition()
+    
+    def warm_up(self, count: Optional[int] = None):
+        """
+        Start drivers ahead of time so the first requests don't pay browser startup.
+        
+        Args:
+            count: Number of drivers to have ready (default: the pool size)
+        """
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._cond:
+                if self._count >= count:
+                    return
+                self._count += 1
+            driver = self._start_driver()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+    
+    def acquire(self) -> webdriver.Chrome:
+        """Check out an idle driver, starting a new one if the pool isn't full yet."""
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._count < self.size:
+                    # Reserve the slot now so concurrent callers don't overshoot the pool size
+                    self._count += 1
+                    break
+                self._cond.wait()
+        
+        return self._start_driver()
+    
+    def release(self, driver: webdriver.Chrome, broken: bool = False):
+        """
+        Return a checked-out driver to the pool.
+        
+        Args:
+            driver: Driver obtained from acquire()
+            broken: Whether the request using it failed; the driver is then replaced
+        """
+        with self._cond:
+            # A driver unknown to the pool was checked out before close(); just shut it down
+            owned = driver in self._uses
+            uses = self._uses.get(driver, 0) + 1
+            recycle = not owned or broken or uses >= self.max_uses
+            if owned and recycle:
+                # Free the slot; a waiter takes it over and starts a fresh driver
+                del self._uses[driver]
+                self._count -= 1
+                self._cond.notify()
+            elif owned:
+                self._uses[driver] = uses
+                self._idle.append(driver)
+                self._cond.notify()
+        
+        if recycle:
+            if owned:
+                logger.debug(f"Recycling driver after {uses} uses{' (error)' if broken else ''}")
+            self._quit(driver)
+    
+    def close(self):
+        """Quit every driver owned by the pool and wake any callers blocked in acquire()."""
+        with self._cond:
+            drivers = list(self._uses)
+            self._uses = {}
+            self._idle = []
+            self._count = 0
+            self._cond.notify_all()
+        
+        for driver in drivers:
+            self._quit(driver)
+    
+    def _start_driver(self) -> webdriver.Chrome:
+        """Start a driver for a slot already reserved in self._count."""
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        
+        with self._cond:
+            self._uses[driver] = 0
+        return driver
+    
+    @staticmethod
+    def _quit(driver: webdriver.Chrome):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
 class MercariScraper:
     """
     A web scraper for Mercari Japan using Selenium.
@@ -24,25 +321,89 @@ class MercariScraper:
     
     BASE_URL = "https://jp.mercari.com"
     SEARCH_URL = f"{BASE_URL}/search"
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    # Search result cell selectors, in order of preference
+    # Items Mercari renders on one search results page; more than this never appear by scrolling
+    FIRST_PAGE_SIZE = 120
+    # Seconds the cell count must hold steady before a short result list counts as fully loaded
+    SETTLE_TIME = 1.0
+    ITEM_CELL_SELECTORS = (
+        "li[data-testid='item-cell']",
+        "div[class*='ItemThumbnail']",
+        "mer-item-thumbnail"
+    )
+    HTTP_HEADERS = {
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
+    }
     
-    def __init__(self, delay: float = 2.0, headless: bool = True):
+    def __init__(
+        self,
+        delay: float = 2.0,
+        headless: bool = True,
+        pool_size: int = 3,
+        max_driver_uses: int = 50,
+        cache_size: int = 256,
+        cache_ttl: float = 120,
+        disk_cache_dir: Optional[str] = DEFAULT_DISK_CACHE_DIR,
+        disk_cache_ttl: float = 300
+    ):
         """
         Initialize the scraper.
         
         Args:
-            delay: Delay in seconds (default: 2.0)
+            delay: Maximum seconds to wait for lazy-loaded content on search and product pages (default: 2.0)
             headless: Whether to run in headless mode (default: True)
+            pool_size: Maximum number of Chrome drivers used concurrently (default: 3)
+            max_driver_uses: Requests served by a driver before it is replaced (default: 50)
+            cache_size: Maximum number of search results and product details kept in memory (default: 256)
+            cache_ttl: Seconds an in-memory cache entry stays valid (default: 120)
+            disk_cache_dir: Directory for the on-disk cache, or None to disable it
+            disk_cache_ttl: Seconds an on-disk cache entry stays valid (default: 300)
         """
         self.delay = delay
         self.headless = headless
-        self.driver = None
+        self.pool_size = pool_size
         
-    def _setup_driver(self):
-        """Initialize the Chrome driver if not already done."""
-        if self.driver:
-            return
-
-        print("[Scraper] Initializing Chrome Driver...")
+        # Drivers are started on demand up to pool_size; call warm_up() to start them ahead of time
+        self.pool = BrowserPool(self._setup_driver, size=pool_size, max_uses=max_driver_uses)
+        
+        # HTTP clients for the browserless fast path, one per event loop since a client's
+        # connections are bound to the loop that created them
+        self._http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._http_clients_lock = threading.Lock()
+        
+        # Caps async Selenium fallbacks at pool_size so waiting calls don't pile up in
+        # worker threads blocked on the pool (bound to its event loop like the HTTP client)
+        self._browser_slots = None
+        self._browser_slots_loop = None
+        
+        # Recent results, so repeated identical searches and detail lookups skip the scrape entirely.
+        # The disk cache backs the in-memory one and survives restarts
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._cache_lock = threading.Lock()
+        self.disk_cache_ttl = disk_cache_ttl
+        self._disk_cache = None
+        if disk_cache_dir:
+            try:
+                self._disk_cache = diskcache.Cache(disk_cache_dir)
+            except Exception as e:
+                # A cache is an optimization; an unwritable directory shouldn't stop the scraper
+                logger.warning(f"Disk cache unavailable at {disk_cache_dir}, using memory only: {e}")
+    
+    def warm_up(self, count: Optional[int] = None):
+        """
+        Start Chrome drivers ahead of time so the first browser-backed requests are fast.
+        
+        Args:
+            count: Number of drivers to start (default: pool_size)
+        """
+        self.pool.warm_up(count)
+    
+    def _setup_driver(self) -> webdriver.Chrome:
+        """Start a new Chrome driver."""
+        logger.info("Initializing Chrome Driver...")
         options = Options()
         if self.headless:
             options.add_argument("--headless=new")
@@ -50,27 +411,105 @@ class MercariScraper:
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        options.add_argument(f'user-agent={self.USER_AGENT}')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
+        # Extraction only reads the DOM (image alt text, not image bytes), so skip
+        # downloading images, stylesheets and fonts
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2
+        })
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        
+        # Return from driver.get() at DOMContentLoaded; the waits below cover anything rendered later
+        options.page_load_strategy = 'eager'
+        
         try:
-            self.driver = webdriver.Chrome(
-                service=ChromeService(ChromeDriverManager().install()),
-                options=options
-            )
+            try:
+                driver = webdriver.Chrome(
+                    service=ChromeService(executable_path=_chromedriver_path()),
+                    options=options
+                )
+            except SessionNotCreatedException:
+                # The remembered driver doesn't match the installed Chrome; resolve a fresh one
+                _forget_chromedriver_path()
+                driver = webdriver.Chrome(
+                    service=ChromeService(executable_path=_chromedriver_path()),
+                    options=options
+                )
             # stealth tweaks
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            print("[Scraper] Driver initialized successfully.")
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            
+            # Content settings don't cover every request (e.g. CDN images fetched by scripts),
+            # so also block those URLs at the network layer
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URL_PATTERNS})
+            logger.info("Driver initialized successfully.")
+            return driver
         except Exception as e:
-            print(f"[Scraper] Error initializing driver: {e}")
+            logger.error(f"Error initializing driver: {e}")
             raise e
 
-    def _close_driver(self):
-        """Close the driver if it exists."""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
+    def close(self):
+        """
+        Quit all Chrome drivers, close the HTTP clients and close the disk cache.
+        
+        Each HTTP client is closed on the event loop it belongs to. When this is called
+        from inside a running loop, prefer awaiting aclose() on that loop first.
+        The scraper stays usable afterwards; drivers and clients are started again on
+        the next request.
+        """
+        self.pool.close()
+        
+        with self._http_clients_lock:
+            clients = self._http_clients
+            self._http_clients = {}
+        for loop, client in clients.items():
+            self._close_http_client(loop, client)
+        
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+    
+    async def aclose(self):
+        """Close the HTTP client of the running event loop; call before that loop shuts down."""
+        with self._http_clients_lock:
+            client = self._http_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+    
+    @staticmethod
+    def _close_http_client(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient):
+        """Close a client on its own event loop, wherever that loop currently is."""
+        if loop.is_closed():
+            return  # Nothing can run there anymore; its sockets are released once it's collected
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        try:
+            if loop is running_loop:
+                task = loop.create_task(client.aclose())
+                _http_client_close_tasks.add(task)
+                task.add_done_callback(_on_http_client_closed)
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+            elif running_loop is None:
+                loop.run_until_complete(client.aclose())
+            else:
+                logger.debug("HTTP client left open: its loop is idle and another loop is running here")
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client: {e}")
+    
+    def __enter__(self) -> "MercariScraper":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
 
     def search_products(
         self,
@@ -84,8 +523,199 @@ class MercariScraper:
         """
         Search for products on Mercari Japan.
         """
-        self._setup_driver()
+        url = self._build_search_url(keyword, min_price, max_price, condition, sort)
+        
+        cache_key = self._search_cache_key(url, max_results)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        logger.debug(f"Navigating to: {url}")
+        
+        driver = self.pool.acquire()
+        broken = False
+        try:
+            driver.get(url)
+            
+            # Server-rendered pages embed the results as JSON; reading it skips waiting,
+            # scrolling and HTML parsing entirely
+            products = self._products_from_next_data(driver.execute_script(_NEXT_DATA_SCRIPT), max_results)
+            if products is not None:
+                logger.info(f"Found {len(products)} products in page data.")
+                self._set_cached(cache_key, products)
+                return products
+            
+            # Wait for items to load
+            logger.debug("Waiting for items to load...")
+            wait = WebDriverWait(driver, 15)
+            # Wait for at least one item or a "no results" indicator. We try to wait for the item grid
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li[data-testid='item-cell'], mer-item-thumbnail")))
+            
+            # Scroll down a bit to trigger lazy loading if needed, then wait only until
+            # enough items have rendered or the count has stopped growing (bounded by
+            # self.delay) instead of a fixed sleep
+            driver.execute_script("window.scrollTo(0, 1000);")
+            try:
+                WebDriverWait(driver, self.delay, poll_frequency=0.25).until(_ItemCellsSettled(
+                    list(self.ITEM_CELL_SELECTORS),
+                    min(max_results, self.FIRST_PAGE_SIZE),
+                    min(self.SETTLE_TIME, self.delay)
+                ))
+            except TimeoutException:
+                pass  # Proceed with whatever has rendered
+            
+            # Pull only the item cells out of the browser in one round-trip rather than
+            # serializing the whole page (head, scripts, off-grid DOM) via page_source
+            grid_html = driver.execute_script(_ITEM_GRID_SCRIPT, list(self.ITEM_CELL_SELECTORS), max_results)
+            
+            # Lexbor is a C HTML engine with native CSS selectors, far faster than bs4 for the item grid
+            tree = LexborHTMLParser(grid_html or driver.page_source)
+            
+            products = self._extract_products(tree, max_results)
+            logger.info(f"Found {len(products)} products.")
+            self._set_cached(cache_key, products)
+            return products
+            
+        except Exception as e:
+            broken = True
+            logger.error(f"Error during search: {e}")
+            # Optional warning: if timeout, maybe we got blocked or selector changed
+            if "Time-out" in str(e) or "Timeout" in str(e):
+                logger.warning("Timeout waiting for results. Mercari might be blocking or slow.")
+            return []
+        
+        finally:
+            # Keep the driver alive in the pool for the next request unless it misbehaved
+            self.pool.release(driver, broken)
+    
+    async def asearch_products(
+        self,
+        keyword: str,
+        max_results: int = 20,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        condition: Optional[str] = None,
+        sort: str = "created_time"
+    ) -> List[Dict]:
+        """
+        Async search that reads results over plain HTTP when possible.
+        
+        Falls back to the Selenium scrape (in a worker thread) if the page
+        doesn't carry parseable item data.
+        """
+        url = self._build_search_url(keyword, min_price, max_price, condition, sort)
+        
+        cache_key = self._search_cache_key(url, max_results)
+        cached = await self._aget_cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        products = await self._search_products_http(url, max_results)
+        if products is not None:
+            logger.info(f"Found {len(products)} products via HTTP.")
+            await self._aset_cached(cache_key, products)
+            return products
+        
+        logger.info("HTTP fast path unavailable, falling back to browser.")
+        return await self._run_in_browser(
+            self.search_products, keyword, max_results, min_price, max_price, condition, sort
+        )
+    
+    async def _run_in_browser(self, func: Callable, *args) -> Any:
+        """Run a Selenium-backed method in a worker thread, at most pool_size at a time."""
+        loop = asyncio.get_running_loop()
+        if self._browser_slots is None or self._browser_slots_loop is not loop:
+            self._browser_slots = asyncio.Semaphore(self.pool_size)
+            self._browser_slots_loop = loop
         
+        async with self._browser_slots:
+            return await asyncio.to_thread(func, *args)
+    
+    def _get_cached(self, key: str) -> Optional[Any]:
+        """Return a cached search result or product details, or None on a miss."""
+        value = self._get_memory_cached(key)
+        if value is None:
+            value = self._get_disk_cached(key)
+        
+        if value is not None:
+            logger.info(f"Using cached result for: {key}")
+        return value
+    
+    async def _aget_cached(self, key: str) -> Optional[Any]:
+        """Async version of _get_cached() that reads the disk cache in a worker thread."""
+        value = self._get_memory_cached(key)
+        if value is None and self._disk_cache is not None:
+            value = await asyncio.to_thread(self._get_disk_cached, key)
+        
+        if value is not None:
+            logger.info(f"Using cached result for: {key}")
+        return value
+    
+    def _set_cached(self, key: str, value: Any):
+        """Cache a result. Empty results aren't cached since they're usually failures."""
+        if not value:
+            return
+        with self._cache_lock:
+            self._cache[key] = value
+        self._set_disk_cached(key, value)
+    
+    async def _aset_cached(self, key: str, value: Any):
+        """Async version of _set_cached() that writes the disk cache in a worker thread."""
+        if not value:
+            return
+        with self._cache_lock:
+            self._cache[key] = value
+        if self._disk_cache is not None:
+            await asyncio.to_thread(self._set_disk_cached, key, value)
+    
+    def _get_memory_cached(self, key: str) -> Optional[Any]:
+        with self._cache_lock:
+            return self._cache.get(key)
+    
+    def _get_disk_cached(self, key: str) -> Optional[Any]:
+        """Read a disk cache entry (SQLite I/O that can block on the cache lock), promoting hits to memory."""
+        if self._disk_cache is None:
+            return None
+        
+        try:
+            raw = self._disk_cache.get(key)
+        except Exception as e:
+            logger.warning(f"Disk cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        
+        value = orjson.loads(raw)
+        # Promote to memory so the next hit skips the disk read
+        with self._cache_lock:
+            self._cache[key] = value
+        return value
+    
+    def _set_disk_cached(self, key: str, value: Any):
+        if self._disk_cache is None:
+            return
+        try:
+            self._disk_cache.set(key, orjson.dumps(value), expire=self.disk_cache_ttl)
+        except Exception as e:
+            logger.warning(f"Disk cache write failed: {e}")
+    
+    @staticmethod
+    def _search_cache_key(url: str, max_results: int) -> str:
+        return f"search:{max_results}:{url}"
+    
+    @staticmethod
+    def _details_cache_key(product_url: str) -> str:
+        return f"item:{product_url}"
+    
+    def _build_search_url(
+        self,
+        keyword: str,
+        min_price: Optional[int],
+        max_price: Optional[int],
+        condition: Optional[str],
+        sort: str
+    ) -> str:
+        """Build the search page URL for the given filters."""
         params = {
             'keyword': keyword,
             'sort': sort
@@ -99,51 +729,244 @@ class MercariScraper:
             params['item_condition_id'] = self._map_condition(condition)
         
         query_string = urllib.parse.urlencode(params)
-        url = f"{self.SEARCH_URL}?{query_string}"
+        return f"{self.SEARCH_URL}?{query_string}"
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the HTTP/2 client for the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        with self._http_clients_lock:
+            client = self._http_clients.get(loop)
+            if client is not None:
+                return client
+            
+            # Clients on loops that have since closed can't be awaited anymore; close() and
+            # aclose() are the clean paths, this only stops the mapping from growing
+            self._http_clients = {l: c for l, c in self._http_clients.items() if not l.is_closed()}
+            client = self._http_clients[loop] = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers=self.HTTP_HEADERS,
+                timeout=15,
+                follow_redirects=True
+            )
+        return client
+    
+    async def _fetch_next_data(self, url: str) -> Optional[str]:
+        """
+        Fetch a page without a browser and return its raw __NEXT_DATA__ JSON.
+        
+        Returns:
+            The JSON text, or None if the request failed (including bot-challenge
+            responses) or the page carries no data blob
+        """
+        try:
+            response = await self._get_http_client().get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP request failed: {e}")
+            return None
         
-        print(f"[Scraper] Navigating to: {url}")
+        # Only build the one node we need; the rest of the page is skipped during parsing
+        script = BeautifulSoup(response.text, _HTML_PARSER, parse_only=_NEXT_DATA_STRAINER).find('script', id='__NEXT_DATA__')
+        return str(script.string) if script and script.string else None
+    
+    async def _search_products_http(self, url: str, max_results: int) -> Optional[List[Dict]]:
+        """
+        Fetch a search page without a browser and read items from its __NEXT_DATA__ JSON.
+        
+        Returns:
+            List of products, or None if the request failed or the page structure wasn't recognized
+        """
+        return self._products_from_next_data(await self._fetch_next_data(url), max_results)
+    
+    async def _get_product_details_http(self, product_url: str) -> Optional[Dict]:
+        """
+        Fetch a product page without a browser and read its details from __NEXT_DATA__ JSON.
+        
+        Returns:
+            Product details, or None if the request failed or the page structure wasn't recognized
+        """
+        return self._product_details_from_next_data(await self._fetch_next_data(product_url), product_url)
+    
+    def _products_from_next_data(self, raw: Optional[str], max_results: int) -> Optional[List[Dict]]:
+        """
+        Build products from the raw __NEXT_DATA__ JSON of a search page.
+        
+        Returns:
+            List of products, or None if the JSON is missing or its structure wasn't recognized
+        """
+        page_props = self._next_data_page_props(raw)
+        if page_props is None:
+            return None
+        
+        items = self._find_next_data_items(page_props)
+        if items is None:
+            return None
+        
+        products = []
+        for item in items[:max_results]:
+            product = self._product_from_item_json(item)
+            if product:
+                products.append(product)
+        return products
+    
+    @staticmethod
+    def _next_data_page_props(raw: Optional[str]) -> Optional[Dict]:
+        """
+        Parse raw __NEXT_DATA__ JSON and return its props.pageProps object.
+        
+        Returns:
+            The page props, or None if the JSON is missing, invalid or shaped differently
+            than expected, so callers fall back to another extraction path
+        """
+        if not raw:
+            return None
         
         try:
-            self.driver.get(url)
-            
-            # Wait for items to load
-            print("[Scraper] Waiting for items to load...")
-            wait = WebDriverWait(self.driver, 15)
-            # Wait for at least one item or a "no results" indicator. We try to wait for the item grid
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li[data-testid='item-cell'], mer-item-thumbnail")))
-            
-            # Scroll down a bit to trigger lazy loading if needed
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(self.delay)
-            
-            # Use BeautifulSoup for parsing as it's faster for bulk static HTML
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            products = self._extract_products(soup, max_results)
-            print(f"[Scraper] Found {len(products)} products.")
-            return products
+            payload = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return None
+        
+        props = payload.get('props') if isinstance(payload, dict) else None
+        page_props = props.get('pageProps') if isinstance(props, dict) else None
+        return page_props if isinstance(page_props, dict) else None
+    
+    def _find_next_data_items(self, page_props: Dict) -> Optional[List[Dict]]:
+        """
+        Look up the search result list at one of the known key paths in the page props.
+        
+        Returns:
+            The item list, empty for a search with no hits, or None if no known path holds
+            a list of item objects
+        """
+        for path in _NEXT_DATA_ITEM_PATHS:
+            node = page_props
+            for key in path:
+                node = node.get(key) if isinstance(node, dict) else None
             
-        except Exception as e:
-            print(f"[Scraper] Error during search: {e}")
-            # Optional warning: if timeout, maybe we got blocked or selector changed
-            if "Time-out" in str(e) or "Timeout" in str(e):
-                print("[Scraper] Timeout waiting for results. Mercari might be blocking or slow.")
-            return []
+            if isinstance(node, list) and all(
+                isinstance(x, dict) and 'id' in x and 'name' in x and 'price' in x for x in node
+            ):
+                return node
+        return None
+    
+    def _product_from_item_json(self, item: Dict) -> Optional[Dict]:
+        """Convert an item object from Mercari's page JSON into the scraper's product format."""
+        item_id = item.get('id')
+        if not item_id:
+            return None
+        
+        price = self._json_int(item.get('price'))
+        status = str(item.get('status', '')).lower()
+        
+        return {
+            'url': f"{self.BASE_URL}/item/{item_id}",
+            'id': item_id,
+            'name': item.get('name') or 'Unknown Product',
+            'price': price,
+            'price_display': f"¥{price:,}" if price else 'N/A',
+            'condition': 'See details',
+            'is_sold': 'sold' in status or 'trading' in status
+        }
+    
+    def _product_details_from_next_data(self, raw: Optional[str], product_url: str) -> Optional[Dict]:
+        """
+        Build full product details from the raw __NEXT_DATA__ JSON of a product page.
+        
+        Returns:
+            Product details, or None if the JSON is missing or the item wasn't found in it
+        """
+        page_props = self._next_data_page_props(raw)
+        if page_props is None:
+            return None
+        
+        match = _ITEM_ID_RE.search(product_url)
+        item_id = match.group(1) if match else None
+        item = self._find_next_data_item(page_props, item_id)
+        if not item:
+            return None
+        
+        price = self._json_int(item.get('price'))
+        status = str(item.get('status', '')).lower()
+        
+        shipping = ' / '.join(filter(None, [
+            self._json_name(item.get('shippingPayer') or item.get('shipping_payer')),
+            self._json_name(item.get('shippingMethod') or item.get('shipping_method')),
+            self._json_name(item.get('shippingDuration') or item.get('shipping_duration'))
+        ]))
+        
+        seller = item.get('seller') if isinstance(item.get('seller'), dict) else {}
+        
+        categories = item.get('categories') or []
+        category = ' > '.join(filter(None, (self._json_name(c) for c in categories))) if isinstance(categories, list) else ''
+        category = category or self._json_name(item.get('itemCategory') or item.get('item_category'))
         
-        # We don't close the driver here to keep it alive for next request, but in a long lived app we might want to manage lifecycle better.
+        photos = item.get('photos') or item.get('thumbnails') or []
+        images = [photo.get('url') if isinstance(photo, dict) else photo for photo in photos]
+        images = [image for image in images if isinstance(image, str)][:10]
+        
+        return {
+            'url': product_url,
+            'id': item.get('id'),
+            'name': item.get('name') or 'Unknown Product',
+            'price': price,
+            'price_display': f"¥{price:,}" if price else 'N/A',
+            'condition': self._json_name(item.get('itemCondition') or item.get('item_condition')) or 'Not specified',
+            'description': item.get('description') or 'No description available',
+            'shipping': shipping or 'See listing',
+            'seller_name': seller.get('name') or 'Unknown',
+            'seller_url': f"{self.BASE_URL}/user/profile/{seller['id']}" if seller.get('id') else '',
+            'category': category or 'Not specified',
+            'is_sold': 'sold' in status or 'trading' in status,
+            'likes': self._json_int(item.get('numLikes') or item.get('num_likes')),
+            'images': images,
+            'image_count': len(images)
+        }
+    
+    def _find_next_data_item(self, node: Any, item_id: Optional[str]) -> Optional[Dict]:
+        """Walk the Next.js page props and return the object describing the given item."""
+        if isinstance(node, dict):
+            if item_id and node.get('id') == item_id and 'name' in node and 'price' in node:
+                return node
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            return None
+        
+        for child in children:
+            item = self._find_next_data_item(child, item_id)
+            if item:
+                return item
+        return None
+    
+    @staticmethod
+    def _json_int(value: Any) -> int:
+        """Coerce a numeric JSON field (Mercari sends some as strings) to int, defaulting to 0."""
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+    
+    @staticmethod
+    def _json_name(value: Any) -> str:
+        """Return the display name of a JSON field that is either a plain string or a {'name': ...} object."""
+        if isinstance(value, dict):
+            return str(value.get('name') or '')
+        return str(value) if value else ''
     
-    def _extract_products(self, soup: BeautifulSoup, max_results: int) -> List[Dict]:
+    def _extract_products(self, tree: LexborHTMLParser, max_results: int) -> List[Dict]:
         """
         Extract product information from the search results HTML.
         """
         products = []
         
         # Mercari structure (Subject to change, hence multiple selectors)
-        product_items = (
-            soup.find_all('li', {'data-testid': 'item-cell'}) or
-            soup.find_all('div', class_=lambda x: x and 'ItemThumbnail' in x) or
-            soup.find_all('mer-item-thumbnail') 
-        )
+        product_items = []
+        for selector in self.ITEM_CELL_SELECTORS:
+            product_items = tree.css(selector)
+            if product_items:
+                break
         
         for item in product_items[:max_results]:
             try:
@@ -155,53 +978,75 @@ class MercariScraper:
         
         return products
     
-    def _extract_product_info(self, item) -> Optional[Dict]:
+    def _extract_product_info(self, item: LexborNode) -> Optional[Dict]:
         product = {}
         
+        # Collect every candidate node for every field in one pass over the cell (matches come
+        # back in document order), then pick per field by selector preference below
+        link = img = None
+        title_candidates = [None, None, None]  # thumbnail-title, h3, itemName
+        price_candidates = [None, None, None]  # thumbnail-price, *price*, mer-price
+        sold_indicator = False
+        for node in item.css(_ITEM_FIELDS_SELECTOR):
+            tag = node.tag
+            if tag == 'a':
+                link = link or node
+            elif tag == 'img':
+                img = img or node
+            elif tag == 'h3':
+                title_candidates[1] = title_candidates[1] or node
+            elif tag == 'mer-price':
+                price_candidates[2] = price_candidates[2] or node
+            elif tag == 'div':
+                sold_indicator = True
+            elif tag == 'span':
+                testid = node.attributes.get('data-testid')
+                css_class = node.attributes.get('class') or ''
+                if testid == 'thumbnail-title':
+                    title_candidates[0] = title_candidates[0] or node
+                if testid == 'thumbnail-price':
+                    price_candidates[0] = price_candidates[0] or node
+                if 'itemName' in css_class:
+                    title_candidates[2] = title_candidates[2] or node
+                if 'price' in css_class.lower():
+                    price_candidates[1] = price_candidates[1] or node
+        
         # URL & ID
-        link = item.find('a', href=lambda x: x and '/item/' in str(x))
         if not link:
-            link = item if item.name == 'a' else None
+            link = item if item.tag == 'a' else None
         
-        if link and link.get('href'):
-            href = link['href']
+        href = link.attributes.get('href') if link else None
+        if href:
             product['url'] = self.BASE_URL + href if not href.startswith('http') else href
-            product['id'] = href.split('/item/')[-1].split('?')[0] if '/item/' in href else 'unknown'
+            match = _ITEM_ID_RE.search(href)
+            product['id'] = match.group(1) if match else 'unknown'
         else:
             return None
         
         # Name
-        title_elem = (
-            item.find('span', {'data-testid': 'thumbnail-title'}) or
-            item.find('h3') or
-            item.find(lambda tag: tag.name == "span" and "itemName" in str(tag.get('class', '')))
-        )
+        title_elem = next((node for node in title_candidates if node), None)
+        img_alt = img.attributes.get('alt') if img else None
         if title_elem:
              # Look for "alt" attribute in image if title text is missing or weird
-             img = item.find('img')
-             if img and img.get('alt') and len(title_elem.get_text(strip=True)) < 3:
-                  product['name'] = img.get('alt')
+             title_text = title_elem.text(strip=True)
+             if img_alt and len(title_text) < 3:
+                  product['name'] = img_alt
              else:
-                  product['name'] = title_elem.get_text(strip=True)
+                  product['name'] = title_text
         else:
              # Fallback to image alt
-             img = item.find('img')
-             product['name'] = img.get('alt') if img else 'Unknown Product'
+             product['name'] = img_alt if img else 'Unknown Product'
 
         # Price
-        price_elem = (
-            item.find('span', {'data-testid': 'thumbnail-price'}) or
-            item.find('span', class_=lambda x: x and 'price' in str(x).lower()) or
-            item.find('mer-price')
-        )
+        price_elem = next((node for node in price_candidates if node), None)
         
         if price_elem:
-            price_text = price_elem.get_text(strip=True)
-            if not price_text and price_elem.has_attr('value'): # mer-price might have value attr
-                price_text = price_elem['value']
+            price_text = price_elem.text(strip=True)
+            if not price_text and 'value' in price_elem.attributes: # mer-price might have value attr
+                price_text = price_elem.attributes['value'] or ''
                 
-            price_clean = ''.join(filter(str.isdigit, price_text))
-            product['price'] = int(price_clean) if price_clean else 0
+            digits = _NON_DIGIT_RE.sub('', price_text)
+            product['price'] = int(digits) if digits else 0
             product['price_display'] = f"¥{product['price']:,}"
         else:
             product['price'] = 0
@@ -212,13 +1057,10 @@ class MercariScraper:
         product['condition'] = 'See details' # Default as it's often hidden in grid
         
         # Sold status
-        # Look for "sold" overlay
-        sold_indicator = (
-            item.find('div', {'aria-label': '売り切れ'}) or
-            item.find('div', class_='sold') or 
-            item.find(string='SOLD')
-        )
-        product['is_sold'] = bool(sold_indicator)
+        # Look for "sold" overlay, else a bare "SOLD" text node (text nodes joined natively)
+        if not sold_indicator:
+            sold_indicator = 'SOLD' in item.text(separator='\x00').split('\x00')
+        product['is_sold'] = sold_indicator
         
         return product
     
@@ -242,25 +1084,44 @@ class MercariScraper:
         Returns:
             Dictionary containing complete product details or None if failed
         """
-        self._setup_driver()
+        cache_key = self._details_cache_key(product_url)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
-        print(f"[Scraper] Fetching product details from: {product_url}")
+        logger.debug(f"Fetching product details from: {product_url}")
         
+        driver = self.pool.acquire()
+        broken = False
         try:
-            self.driver.get(product_url)
+            driver.get(product_url)
+            
+            # Server-rendered pages embed the item as JSON; reading it skips the waits and
+            # the DOM fallback chains below entirely
+            product = self._product_details_from_next_data(driver.execute_script(_NEXT_DATA_SCRIPT), product_url)
+            if product is not None:
+                logger.info(f"Extracted details from page data for: {product['name'][:50]}...")
+                self._set_cached(cache_key, product)
+                return product
             
             # Wait for main content to load
-            wait = WebDriverWait(self.driver, 15)
+            wait = WebDriverWait(driver, 15)
             wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "mer-heading, h1, [data-testid='item-name']")))
             
-            # Additional wait for dynamic content
-            time.sleep(self.delay)
+            # Wait (bounded by self.delay) for the client-rendered price/description instead of a fixed sleep
+            try:
+                WebDriverWait(driver, self.delay).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "mer-price, [data-testid='price'], [data-testid='description']"))
+                )
+            except TimeoutException:
+                pass  # Extract whatever has rendered
             
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            soup = BeautifulSoup(driver.page_source, _HTML_PARSER)
             
+            match = _ITEM_ID_RE.search(product_url)
             product = {
                 'url': product_url,
-                'id': product_url.split('/item/')[-1].split('?')[0] if '/item/' in product_url else 'unknown'
+                'id': match.group(1) if match else 'unknown'
             }
             
             # Product Name/Title
@@ -279,7 +1140,7 @@ class MercariScraper:
             )
             if price_elem:
                 price_text = price_elem.get('value') or price_elem.get_text(strip=True)
-                price_clean = ''.join(filter(str.isdigit, str(price_text)))
+                price_clean = _NON_DIGIT_RE.sub('', str(price_text))
                 product['price'] = int(price_clean) if price_clean else 0
                 product['price_display'] = f"¥{product['price']:,}"
             else:
@@ -289,8 +1150,8 @@ class MercariScraper:
             # Condition - Look for the item condition section
             condition_elem = (
                 soup.find('span', {'data-testid': 'item-condition'}) or
-                soup.find('mer-text', string=lambda x: x and ('新品' in str(x) or '中古' in str(x) or '未使用' in str(x))) or
-                soup.find(string=lambda x: x and '商品の状態' in str(x))
+                soup.find('mer-text', string=_CONDITION_TEXT_RE) or
+                soup.find(string=_CONDITION_LABEL_RE)
             )
             if condition_elem:
                 # Try to get the actual condition value
@@ -305,8 +1166,8 @@ class MercariScraper:
                     product['condition'] = str(condition_elem)
             else:
                 # Try alternative: look for condition in table rows
-                rows = soup.find_all('mer-display-row') or soup.find_all('tr')
-                for row in rows:
+                row_tag = 'mer-display-row' if soup.find('mer-display-row') else 'tr'
+                for row in _iter_tags(soup, (row_tag,)):
                     text = row.get_text(strip=True)
                     if '状態' in text or 'condition' in text.lower():
                         product['condition'] = text.replace('商品の状態', '').strip()
@@ -319,25 +1180,25 @@ class MercariScraper:
                 soup.find('mer-text', {'data-testid': 'description'}) or
                 soup.find('pre', {'data-testid': 'description'}) or
                 soup.find('div', {'data-testid': 'description'}) or
-                soup.find('section', {'aria-labelledby': lambda x: x and 'description' in str(x).lower()})
+                soup.select_one("section[aria-labelledby*='description' i]")
             )
             if desc_elem:
                 product['description'] = desc_elem.get_text(strip=True)
             else:
                 # Fallback: look for any large text block
-                desc_section = soup.find('section', class_=lambda x: x and 'description' in str(x).lower())
+                desc_section = soup.select_one("section[class*='description' i]")
                 product['description'] = desc_section.get_text(strip=True) if desc_section else 'No description available'
             
             # Shipping Information
             shipping_elem = (
                 soup.find('span', {'data-testid': 'shipping-fee'}) or
-                soup.find('mer-text', string=lambda x: x and ('送料' in str(x) or '配送' in str(x)))
+                soup.find('mer-text', string=_SHIPPING_TEXT_RE)
             )
             if shipping_elem:
                 product['shipping'] = shipping_elem.get_text(strip=True)
             else:
                 # Look in table rows
-                for row in soup.find_all(['mer-display-row', 'tr', 'div']):
+                for row in _iter_tags(soup, ('mer-display-row', 'tr', 'div')):
                     text = row.get_text(strip=True)
                     if '送料' in text or '配送' in text:
                         product['shipping'] = text
@@ -349,7 +1210,7 @@ class MercariScraper:
             seller_elem = (
                 soup.find('a', {'data-testid': 'seller-name'}) or
                 soup.find('mer-user-object') or
-                soup.find('a', href=lambda x: x and '/user/profile/' in str(x))
+                soup.select_one("a[href*='/user/profile/']")
             )
             if seller_elem:
                 product['seller_name'] = seller_elem.get_text(strip=True) or seller_elem.get('name', 'Unknown')
@@ -372,8 +1233,8 @@ class MercariScraper:
             # Sold Status
             sold_indicator = (
                 soup.find('div', {'aria-label': '売り切れ'}) or
-                soup.find('mer-text', string=lambda x: x and 'SOLD' in str(x).upper()) or
-                soup.find(string=lambda x: x and '売り切れ' in str(x))
+                soup.find('mer-text', string=_SOLD_TEXT_RE) or
+                soup.find(string=_SOLD_OUT_TEXT_RE)
             )
             product['is_sold'] = bool(sold_indicator)
             
@@ -381,24 +1242,94 @@ class MercariScraper:
             likes_elem = soup.find('span', {'data-testid': 'like-count'}) or soup.find('mer-icon-button', {'name': 'heart'})
             if likes_elem:
                 likes_text = likes_elem.get_text(strip=True)
-                likes_clean = ''.join(filter(str.isdigit, likes_text))
+                likes_clean = _NON_DIGIT_RE.sub('', likes_text)
                 product['likes'] = int(likes_clean) if likes_clean else 0
             else:
                 product['likes'] = 0
             
             # Images
-            img_elements = soup.find_all('img', {'data-testid': lambda x: x and 'image' in str(x).lower()})
+            img_elements = soup.select("img[data-testid*='image' i]", limit=10)
             if not img_elements:
-                img_elements = soup.find_all('img', src=lambda x: x and 'static.mercdn.net' in str(x))
+                img_elements = soup.select("img[src*='static.mercdn.net']", limit=10)
             product['images'] = [img.get('src') for img in img_elements[:10] if img.get('src')]
             product['image_count'] = len(product['images'])
             
-            print(f"[Scraper] Successfully extracted details for: {product['name'][:50]}...")
+            logger.info(f"Successfully extracted details for: {product['name'][:50]}...")
+            self._set_cached(cache_key, product)
             return product
             
         except Exception as e:
-            print(f"[Scraper] Error fetching product details: {e}")
+            broken = True
+            logger.error(f"Error fetching product details: {e}")
             return None
+        
+        finally:
+            self.pool.release(driver, broken)
 
-    def __del__(self):
-        self._close_driver()
+    async def aget_product_details(self, product_url: str) -> Optional[Dict]:
+        """
+        Async version of get_product_details() that reads the page over plain HTTP when possible.
+        
+        Falls back to Selenium, which runs in a worker thread with its own pooled
+        driver so the event loop stays free and concurrent calls don't share a browser.
+        """
+        cache_key = self._details_cache_key(product_url)
+        cached = await self._aget_cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        product = await self._get_product_details_http(product_url)
+        if product is not None:
+            logger.info(f"Fetched details via HTTP for: {product['name'][:50]}...")
+            await self._aset_cached(cache_key, product)
+            return product
+        
+        return await self._run_in_browser(self.get_product_details, product_url)
+    
+    def get_products_details_bulk(self, product_urls: List[str]) -> List[Optional[Dict]]:
+        """
+        Scrape several product pages concurrently, each with its own pooled driver.
+        
+        Args:
+            product_urls: Full URLs to Mercari product pages
+            
+        Returns:
+            Product details (or None for failures, including errors) in the same order as product_urls
+        """
+        if not product_urls:
+            return []
+        
+        workers = min(self.pool_size, len(product_urls))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._get_product_details_or_none, product_urls))
+    
+    def _get_product_details_or_none(self, product_url: str) -> Optional[Dict]:
+        """get_product_details() for bulk fetches, where one failing page (e.g. Chrome not starting) mustn't sink the rest."""
+        try:
+            return self.get_product_details(product_url)
+        except Exception as e:
+            logger.error(f"Error fetching product details for {product_url}: {e}")
+            return None
+    
+    async def aget_products_details_bulk(self, product_urls: List[str]) -> List[Optional[Dict]]:
+        """
+        Async version of get_products_details_bulk().
+        
+        Each URL goes through aget_product_details(), so pages readable over HTTP skip
+        the browser; at most pool_size Selenium fallbacks run at once.
+        """
+        results = await asyncio.gather(
+            *[self.aget_product_details(url) for url in product_urls],
+            return_exceptions=True
+        )
+        
+        # One failing page (e.g. Chrome not starting for its fallback) mustn't sink the rest
+        products = []
+        for url, result in zip(product_urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching product details for {url}: {result}")
+                result = None
+            elif isinstance(result, BaseException):
+                raise result
+            products.append(result)
+        return products
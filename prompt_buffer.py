@@ -0,0 +1,119 @@
+"""
+Prompt Assembly for the Mercari AI Agent
+
+This module keeps the messages sent to the model in two parts: a stable prefix
+(system message and completed turns) and a volatile suffix (the turn in progress).
+Providers cache prompts by exact prefix, so the prefix is only ever extended
+with completed turns and never edited in place.
+"""
+
+import json
+from typing import List, Dict, Any, Optional
+
+
+class PromptBuffer:
+    """
+    Message buffer that keeps a byte-stable prefix for provider prompt caching.
+    """
+
+    def __init__(self, system_message: Dict[str, Any]):
+        """
+        Initialize the buffer.
+
+        Args:
+            system_message: The system message that always leads the prompt
+        """
+        self.system_message = system_message
+        self.static_prefix_messages: List[Any] = [system_message]
+        self.dynamic_suffix: List[Any] = []
+
+    @property
+    def history(self) -> List[Any]:
+        """Completed conversation turns, without the system message."""
+        return self.static_prefix_messages[1:]
+
+    def start_turn(self, user_message: str):
+        """Begin a new turn, discarding anything left over from an unfinished one."""
+        self.dynamic_suffix = [{"role": "user", "content": user_message}]
+
+    def append(self, message: Any):
+        """Add an in-flight message (assistant tool calls, tool results) to the current turn."""
+        self.dynamic_suffix.append(message)
+
+    def build(self) -> List[Any]:
+        """Return the full message list for the next model call."""
+        return self.static_prefix_messages + self.dynamic_suffix
+
+    def commit_turn(self, assistant_content: str):
+        """
+        Move the current turn into the prefix.
+
+        Only the user message and the final answer are kept; intermediate tool
+        traffic is dropped. The prefix list is swapped rather than mutated so a
+        concurrent build() never sees a half-committed turn.
+        """
+        user_message = self.dynamic_suffix[0] if self.dynamic_suffix else None
+        committed = [user_message] if user_message else []
+        committed.append({"role": "assistant", "content": assistant_content})
+
+        self.static_prefix_messages = self.static_prefix_messages + committed
+        self.dynamic_suffix = []
+
+    def reset(self):
+        """Drop all turns, keeping only the system message."""
+        self.static_prefix_messages = [self.system_message]
+        self.dynamic_suffix = []
+
+    def estimate_tokens(self) -> int:
+        """Rough token count of the completed turns (about 4 characters per token)."""
+        return sum(len(message.get("content") or "") for message in self.history) // 4
+
+    def compact(self, summary: str, keep_messages: int):
+        """
+        Replace all but the most recent messages with a summary.
+
+        The summary goes right after the system message as its own system message,
+        so the prefix stays stable across calls until the next compaction.
+
+        Args:
+            summary: Summary of the messages being dropped
+            keep_messages: Number of recent messages to keep verbatim
+        """
+        recent = self.history[-keep_messages:] if keep_messages > 0 else []
+        summary_message = {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+        self.static_prefix_messages = [self.system_message, summary_message] + recent
+
+    def dumps(self) -> str:
+        """Serialize the completed turns to JSON."""
+        return json.dumps(self.history, ensure_ascii=False)
+
+    def loads(self, data: str, max_turns: Optional[int] = None):
+        """
+        Restore completed turns from dumps() output, replacing the current history.
+
+        Args:
+            data: JSON produced by dumps()
+            max_turns: Keep only this many of the most recent user/assistant turns
+
+        Raises:
+            ValueError: If data isn't JSON or isn't a list of role/content messages
+        """
+        messages = json.loads(data)
+        if not isinstance(messages, list) or not all(
+            isinstance(m, dict) and isinstance(m.get("role"), str) and "content" in m for m in messages
+        ):
+            raise ValueError("Saved history must be a list of messages with role and content")
+
+        # A compacted history leads with a summary message; it isn't a turn, so it's
+        # set aside before trimming and always kept
+        summary = messages[:1] if messages and messages[0].get("role") == "system" else []
+        messages = messages[len(summary):]
+
+        if max_turns is not None:
+            messages = messages[-2 * max_turns:] if max_turns > 0 else []
+            # Never start the history on a dangling assistant reply
+            if messages and messages[0].get("role") == "assistant":
+                messages = messages[1:]
+
+        self.static_prefix_messages = [self.system_message] + summary + messages
+        self.dynamic_suffix = []
@@ -5,12 +5,39 @@ This module defines the tools that the AI agent can use to interact with Mercari
 Tools are defined in the format required by OpenAI's function calling API.
 """
 
+import orjson
+import atexit
+import heapq
+import asyncio
 from typing import List, Dict, Any, Optional
+import numpy as np
+import ahocorasick
 from mercari_scraper import MercariScraper
 
 
-# Initialize the scraper
+# Condition keywords, best tier first: (keywords, (score, reason))
+_CONDITION_TIERS = [
+    (('新品', 'new'), (100, "Excellent condition (new)")),
+    (('未使用', 'unused'), (85, "Very good condition (unused)")),
+    (('目立った傷', 'good'), (70, "Good condition")),
+]
+
+# Aho-Corasick automaton over all condition keywords, mapping each to its tier index
+_CONDITION_MATCHER = ahocorasick.Automaton()
+for _tier, (_keywords, _) in enumerate(_CONDITION_TIERS):
+    for _keyword in _keywords:
+        _CONDITION_MATCHER.add_word(_keyword, _tier)
+_CONDITION_MATCHER.make_automaton()
+
+
+# Initialize the scraper; Chrome is started lazily and shut down explicitly at exit,
+# since relying on __del__ during interpreter teardown leaves orphaned browsers
 scraper = MercariScraper()
+atexit.register(scraper.close)
+
+
+# Most product pages get_product_details_bulk fetches per call; extra URLs are reported back as failed
+MAX_BULK_DETAILS = 10
 
 
 # Tool definitions for OpenAI API (function calling format)
@@ -108,10 +135,46 @@ TOOLS_OPENAI = [
                 "required": ["product_url"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_product_details_bulk",
+            "description": f"Fetch complete details for up to {MAX_BULK_DETAILS} products at once, in parallel. Returns the same information as get_product_details for each URL. Prefer this over repeated get_product_details calls when you need details for multiple products (e.g., all top 3 recommendations).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "product_urls": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "maxItems": MAX_BULK_DETAILS,
+                        "description": f"Full Mercari product URLs, at most {MAX_BULK_DETAILS} (e.g., ['https://jp.mercari.com/item/m12345678901'])"
+                    }
+                },
+                "required": ["product_urls"]
+            }
+        }
     }
 ]
 
 
+# Size of the serialized schema, computed once at import (it's sent with every model call)
+TOOLS_OPENAI_BYTES = len(orjson.dumps(TOOLS_OPENAI))
+
+
+def to_json(result: Dict[str, Any]) -> str:
+    """
+    Serialize a tool result for the model's tool message.
+    
+    Args:
+        result: Dictionary returned by execute_tool() or aexecute_tool()
+    
+    Returns:
+        Compact JSON string with non-ASCII text (e.g. Japanese product names) left unescaped
+    """
+    return orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
 def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
     """
     Execute a tool based on its name and input parameters.
@@ -129,10 +192,28 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         return analyze_products(**tool_input)
     elif tool_name == "get_product_details":
         return get_product_details(**tool_input)
+    elif tool_name == "get_product_details_bulk":
+        return get_product_details_bulk(**tool_input)
     else:
         return {"error": f"Unknown tool: {tool_name}"}
 
 
+async def aexecute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async version of execute_tool().
+    
+    Tools without a native async implementation run in a worker thread so they
+    don't block the event loop.
+    """
+    if tool_name == "search_mercari":
+        return await asearch_mercari(**tool_input)
+    elif tool_name == "get_product_details":
+        return await aget_product_details(**tool_input)
+    elif tool_name == "get_product_details_bulk":
+        return await aget_product_details_bulk(**tool_input)
+    return await asyncio.to_thread(execute_tool, tool_name, tool_input)
+
+
 def search_mercari(
     keyword: str,
     max_results: int = 20,
@@ -180,6 +261,40 @@ def search_mercari(
         }
 
 
+async def asearch_mercari(
+    keyword: str,
+    max_results: int = 20,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    condition: Optional[str] = None,
+    sort: str = "created_time"
+) -> Dict[str, Any]:
+    """Async version of search_mercari() that uses the scraper's HTTP fast path."""
+    try:
+        products = await scraper.asearch_products(
+            keyword=keyword,
+            max_results=min(max_results, 50),  # Cap at 50
+            min_price=min_price,
+            max_price=max_price,
+            condition=condition,
+            sort=sort
+        )
+        
+        return {
+            "success": True,
+            "keyword": keyword,
+            "total_results": len(products),
+            "products": products
+        }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "products": []
+        }
+
+
 def get_product_details(product_url: str) -> Dict[str, Any]:
     """
     Fetch complete details for a specific product by visiting its page.
@@ -213,6 +328,85 @@ def get_product_details(product_url: str) -> Dict[str, Any]:
         }
 
 
+async def aget_product_details(product_url: str) -> Dict[str, Any]:
+    """Async version of get_product_details() that keeps the browser work off the event loop."""
+    try:
+        product = await scraper.aget_product_details(product_url)
+        
+        if product:
+            return {
+                "success": True,
+                "product": product
+            }
+        else:
+            return {
+                "success": False,
+                "error": "Failed to extract product details",
+                "product": None
+            }
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "product": None
+        }
+
+
+def get_product_details_bulk(product_urls: List[str]) -> Dict[str, Any]:
+    """
+    Fetch complete details for several products in parallel.
+    
+    Args:
+        product_urls: Full URLs to Mercari product pages (capped at MAX_BULK_DETAILS)
+    
+    Returns:
+        Dictionary containing the details of each product that could be fetched
+    """
+    try:
+        products = scraper.get_products_details_bulk(product_urls[:MAX_BULK_DETAILS])
+        return _bulk_details_result(product_urls, products)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "products": []
+        }
+
+
+async def aget_product_details_bulk(product_urls: List[str]) -> Dict[str, Any]:
+    """Async version of get_product_details_bulk() that uses the scraper's HTTP fast path."""
+    try:
+        products = await scraper.aget_products_details_bulk(product_urls[:MAX_BULK_DETAILS])
+        return _bulk_details_result(product_urls, products)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "products": []
+        }
+
+
+def _bulk_details_result(product_urls: List[str], products: List[Optional[Dict]]) -> Dict[str, Any]:
+    """
+    Build the bulk details tool result.
+    
+    URLs whose details couldn't be extracted, and any beyond the MAX_BULK_DETAILS
+    that were fetched, are listed in failed_urls.
+    """
+    fetched = [product for product in products if product]
+    result = {
+        "success": bool(fetched),
+        "total_results": len(fetched),
+        "products": fetched
+    }
+    failed = [url for url, product in zip(product_urls, products) if not product]
+    failed += product_urls[len(products):]
+    if failed:
+        result["failed_urls"] = failed
+    return result
+
+
 def _score_condition(condition: str) -> tuple[int, str]:
     """
     Score a product's condition and return the score with a reason.
@@ -223,16 +417,32 @@ def _score_condition(condition: str) -> tuple[int, str]:
     Returns:
         Tuple of (score, reason_string)
     """
-    condition_lower = condition.lower()
-    
-    if '新品' in condition_lower or 'new' in condition_lower:
-        return (100, "Excellent condition (new)")
-    elif '未使用' in condition_lower or 'unused' in condition_lower:
-        return (85, "Very good condition (unused)")
-    elif '目立った傷' in condition_lower or 'good' in condition_lower:
-        return (70, "Good condition")
-    else:
+    # One scan finds every keyword; the highest-priority tier among the hits wins
+    tier = min((tier for _, tier in _CONDITION_MATCHER.iter(condition)), default=None)
+    if tier is None:
         return (50, "Acceptable condition")
+    return _CONDITION_TIERS[tier][1]
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return indices of the k highest scores, best first.
+    
+    Uses a partial partition and a k-sized heap instead of a full sort. Ties are
+    broken by original position, matching a stable descending sort.
+    """
+    if scores.size <= k:
+        return np.argsort(-scores, kind='stable')
+    
+    # Everything scoring at least the k-th best value is a candidate (keeps all ties)
+    kth_best = -np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= kth_best)
+    
+    # Scores take few distinct values, so ties can leave most products as candidates;
+    # heapq.nlargest orders them in O(C log k) and is stable like sorted(reverse=True)
+    candidate_scores = scores[candidates].tolist()
+    best = heapq.nlargest(k, range(len(candidate_scores)), key=candidate_scores.__getitem__)
+    return candidates[best]
 
 
 def analyze_products(
@@ -242,6 +452,9 @@ def analyze_products(
     """
     Analyze products and return top 3 recommendations.
     
+    Products are scored in one vectorized pass over per-field arrays; reason
+    strings are only built for the three products that are returned.
+    
     Args:
         products: List of product dictionaries
         user_preferences: User preferences for ranking
@@ -263,98 +476,98 @@ def analyze_products(
     priority = user_preferences.get('priority', 'balanced')
     max_budget = user_preferences.get('max_budget')
     
-    # Filter out sold items
-    available_products = [p for p in products if not p.get('is_sold', False)]
+    count = len(products)
+    prices = np.fromiter((p.get('price', 0) or 0 for p in products), dtype=np.float64, count=count)
+    sold = np.fromiter((bool(p.get('is_sold', False)) for p in products), dtype=np.bool_, count=count)
     
-    if not available_products:
-        available_products = products  # Fallback to all if none available
+    # Filter out sold items
+    mask = ~sold
+    if not mask.any():
+        mask = np.ones(count, dtype=np.bool_)  # Fallback to all if none available
     
     # Filter by budget if specified
     if max_budget:
-        available_products = [p for p in available_products if p.get('price', 0) <= max_budget]
+        mask &= prices <= max_budget
     
-    if not available_products:
+    indices = np.flatnonzero(mask)
+    if indices.size == 0:
         return {
             "success": False,
             "error": "No products match the budget criteria",
             "recommendations": []
         }
     
-    # Pre-calculate average price for balanced mode (avoids O(n²) complexity)
-    avg_price = None
-    if priority == 'balanced' and available_products:
-        avg_price = sum(p.get('price', 0) for p in available_products) / len(available_products)
+    available_products = [products[i] for i in indices]
+    prices = prices[indices]
+    
+    # Condition scoring is string matching; listings share a handful of condition labels,
+    # so each distinct label is scored once and the results broadcast to an array
+    condition_results = None
+    condition_scores = None
+    if priority != 'price':
+        conditions = [p.get('condition', 'Not specified').lower() for p in available_products]
+        scored_labels = {condition: _score_condition(condition) for condition in set(conditions)}
+        condition_results = [scored_labels[condition] for condition in conditions]
+        condition_scores = np.array([score for score, _ in condition_results], dtype=np.float64)
+    
+    # Scoring logic based on priority
+    has_price_ratio = np.zeros(prices.size, dtype=np.bool_)
+    price_scores = None
+    if priority == 'price':
+        # Lower price is better (inverse of price)
+        scores = np.divide(100000, prices, out=np.zeros_like(prices), where=prices > 0)
     
-    # Score and sort products based on priority
-    scored_products = []
+    elif priority == 'condition':
+        scores = condition_scores
     
-    for product in available_products:
-        score = 0
+    else:  # balanced
+        # Balance between price and condition, with price scored relative to the average
+        avg_price = prices.mean() if priority == 'balanced' else 0
+        price_scores = np.full(prices.size, 50.0)
+        if avg_price > 0:
+            has_price_ratio = prices > 0
+            price_ratios = prices / avg_price
+            price_scores = np.where(
+                has_price_ratio,
+                np.where(price_ratios < 0.8, 100.0, np.where(price_ratios < 1.2, 70.0, 50.0)),
+                50.0
+            )
+        scores = (condition_scores * 0.5) + (price_scores * 0.5)
+    
+    # Bonus for having all information
+    complete = np.fromiter(
+        (bool(p.get('name') and p.get('price') and p.get('url')) for p in available_products),
+        dtype=np.bool_,
+        count=prices.size
+    )
+    scores = scores + complete * 5
+    
+    recommendations = []
+    for rank, i in enumerate(_top_k_indices(scores, 3), 1):
+        product = available_products[i]
         reasons = []
         
-        price = product.get('price', 0)
-        condition = product.get('condition', 'Not specified').lower()
-        
-        # Scoring logic based on priority
         if priority == 'price':
-            # Lower price is better
-            if price > 0:
-                score = 100000 / price  # Inverse of price
-                reasons.append(f"Affordable price at ¥{price:,}")
-        
+            if prices[i] > 0:
+                reasons.append(f"Affordable price at ¥{product.get('price', 0):,}")
         elif priority == 'condition':
-            # Better condition is better - use helper function
-            condition_score, reason = _score_condition(condition)
-            score = condition_score
-            reasons.append(reason)
-        
-        else:  # balanced
-            # Balance between price and condition
-            condition_score, condition_reason = _score_condition(condition)
-            reasons.append(condition_reason)
-            
-            # Price score (relative to average)
-            if price > 0 and avg_price and avg_price > 0:
-                price_ratio = price / avg_price
-                if price_ratio < 0.8:
-                    price_score = 100
-                    reasons.append("Great value - below average price")
-                elif price_ratio < 1.2:
-                    price_score = 70
-                    reasons.append("Fair price")
-                else:
-                    price_score = 50
-            else:
-                price_score = 50
-            
-            score = (condition_score * 0.5) + (price_score * 0.5)
+            reasons.append(condition_results[i][1])
+        else:
+            reasons.append(condition_results[i][1])
+            if has_price_ratio[i] and price_scores[i] == 100:
+                reasons.append("Great value - below average price")
+            elif has_price_ratio[i] and price_scores[i] == 70:
+                reasons.append("Fair price")
         
-        # Bonus for having all information
-        if product.get('name') and product.get('price') and product.get('url'):
-            score += 5
+        if complete[i]:
             reasons.append("Complete product information available")
         
-        scored_products.append({
-            'product': product,
-            'score': score,
-            'reasons': reasons
-        })
-    
-    # Sort by score (descending)
-    scored_products.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Get top 3
-    top_3 = scored_products[:3]
-    
-    recommendations = []
-    for i, item in enumerate(top_3, 1):
-        product = item['product']
         recommendations.append({
-            'rank': i,
+            'rank': rank,
             'product': product,
-            'score': item['score'],
-            'reasons': item['reasons'],
-            'recommendation_summary': f"Ranked #{i} - {product.get('name', 'Unknown')} at {product.get('price_display', 'N/A')}"
+            'score': scores[i].item(),
+            'reasons': reasons,
+            'recommendation_summary': f"Ranked #{rank} - {product.get('name', 'Unknown')} at {product.get('price_display', 'N/A')}"
         })
     
     return {